@@ -1,11 +1,20 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
+import os
+import sys
 import platform
 import pathlib
 import re
+import mmap
+import time
+import hashlib
+import tempfile
+import bisect
+import asyncio
+import functools
 import datetime as dt
-import matplotlib.pyplot as plt
-from openai import OpenAI
+from collections import namedtuple
+import orjson
 
 # ---------- 平台检测 + 路径配置 ----------
 system = platform.system()
@@ -19,12 +28,29 @@ else:
 
 # -------- 基本路径 --------
 JOURNALS = GRAPH_DIR.expanduser() / "journals"
-TASK_RE   = re.compile(r"^- (TODO|DONE)\s+(.*)$")
-DUR_DONE = re.compile(r"\[耗时\s*([0-9\.]+)h\]")      # DONE 后标注实际耗时
-DUR_TODO = re.compile(r"\[已耗时\s*([0-9\.]+)h\]")
-EST_RE   = re.compile(r"\(预计\s*([0-9\.]+)h\)")       # TODO 内标注预计时长
+# 一次匹配整行：状态 + 正文 + 行尾的 (预计 Xh) / [耗时 Xh] / [已耗时 Xh] 标注
+# MULTILINE：直接在整篇日志上 finditer；缩进的子任务同样计入
+# bytes 模式：直接扫描 mmap 的原始字节，只对匹配到的正文做 UTF-8 解码
+# 正文与标注均用占有量词 *+（Python ≥ 3.11）：匹配失败时不再逐字符回吐、
+# 反复重扫空白，长空白行也是线性时间；
+# 标注不在行尾时整行落入 raw 分支，再用下面的 EST_RE / DUR_RE 搜索并剔除标注
+# [耗时 Xh] 与 [已耗时 Xh] 两种写法在 DONE / TODO 上都计入 dur，两条路径规则一致
+_WS       = "(?:[ \t]|\u3000)"       # 空格 / Tab / 全角空格（中文输入法常见）
+LINE_RE   = re.compile((
+    r"^" + _WS + r"*- (?P<st>TODO|DONE)" + _WS + r"++(?=[^\r\n])"   # 状态后须有非空内容
+    r"(?:(?P<body>(?:(?!\(预计|\[(?:耗时|已耗时)).)*+)"
+    r"(?:\(预计" + _WS + r"*+(?P<est>[0-9\.]+)h\)" + _WS + r"*+"     # 预计时长
+    r"|\[(?:耗时|已耗时)" + _WS + r"*+(?P<dur>[0-9\.]+)h\]" + _WS + r"*+)*+"   # 实际耗时 / 已耗时
+    r"\r?$"
+    r"|(?P<raw>.*)$)").encode("utf-8"), re.MULTILINE | re.ASCII)   # 字符类只需 ASCII
+EST_RE    = re.compile((r"\(预计" + _WS + r"*([0-9\.]+)h\)").encode("utf-8"), re.ASCII)
+DUR_RE    = re.compile((r"\[(?:耗时|已耗时)" + _WS + r"*([0-9\.]+)h\]").encode("utf-8"), re.ASCII)
+# 解析结果：DONE 记实际耗时 dur，TODO 记已耗时 spent（单位 h）
+Done = namedtuple("Done", "text est dur")
+Todo = namedtuple("Todo", "text est spent")
 MODEL     = "gpt-4o-mini"
-client    = OpenAI()
+CACHE_DIR = pathlib.Path.home() / ".cache" / "gpt_plan"   # GPT 响应缓存
+CACHE_TTL = 12 * 3600                                     # 秒，覆盖同日重跑
 # ---------------------------------------------
 
 # ---------- 阶段定义 ----------
@@ -40,106 +66,270 @@ PHASES = [
     ("P4", dt.date(2025,7,21), dt.date(2025,8,1),
      "Thesis >=60 p + PPT 20 p"),
 ]
+_PHASE_STARTS = [s for _,s,_,_ in PHASES]                # 已按开始日期排序
+_PHASE_MAP    = {c:(s,e,d) for c,s,e,d in PHASES}
 # ---------- 辅助函数 ----------
-def get_current_phase(today=None):
-    today = today or dt.date.today()
-    for code,start,end,desc in PHASES:
-        if start<=today<=end: return code,desc
+# 两者只依赖日期，today 需显式传入以便按日期缓存
+@functools.lru_cache(maxsize=16)
+def get_current_phase(today):
+    i = bisect.bisect_right(_PHASE_STARTS, today) - 1
+    if i >= 0:
+        code,_,end,desc = PHASES[i]
+        if today<=end: return code,desc
     return PHASES[-1][0],PHASES[-1][3]
 
-def get_time_progress(code):
-    phase = {c:(s,e) for c,s,e,_ in PHASES}[code]
-    start,end = phase
-    today     = dt.date.today()
+@functools.lru_cache(maxsize=16)
+def get_time_progress(code, today):
+    start,end,_ = _PHASE_MAP[code]
     if today<=start: return 0.0
     if today>=end:   return 1.0
     return (today-start).days/(end-start).days
 
-def parse_tasks_for_date(date):
-    done, todo = [], []
-    file = JOURNALS / f"{date:%Y_%m_%d}.md"
-    if not file.exists(): return done, todo
+def _hours(raw, default):
+    """LINE_RE 捕获的时长（bytes，仅含数字和小数点）转 float；未标注时返回 default"""
+    return float(raw) if raw else default
 
-    for line in file.open(encoding="utf-8"):
-        m = TASK_RE.match(line.strip())
-        if not m: continue
-        st, txt = m.groups()
+def _parse_tasks(buf):
+    """
+    从日志原始字节（bytes 或 mmap）解析任务，返回 (done 列表, todo 列表)。
+    标注在行尾时走 LINE_RE 一次匹配；否则回退为逐个搜索并剔除标注。
 
-        est = EST_RE.search(txt)
-        est = float(est.group(1)) if est else 2.0    # 默认 2 h
+    >>> _parse_tasks("- TODO 写代码 (预计 1h) [已耗时 0.5h]".encode())
+    ([], [Todo(text='写代码', est=1.0, spent=0.5)])
+    >>> _parse_tasks("- TODO (预计 1h) 写代码".encode())
+    ([], [Todo(text='写代码', est=1.0, spent=0.0)])
+    >>> _parse_tasks("- DONE [耗时 1h] 写代码".encode())
+    ([Done(text='写代码', est=2.0, dur=1.0)], [])
+    >>> _parse_tasks("- DONE 写代码 [已耗时 1h]".encode())
+    ([Done(text='写代码', est=2.0, dur=1.0)], [])
+    >>> _parse_tasks("- DONE [已耗时 1h] 写代码".encode())
+    ([Done(text='写代码', est=2.0, dur=1.0)], [])
+    >>> _parse_tasks("- TODO [耗时 1h] 写代码".encode())
+    ([], [Todo(text='写代码', est=2.0, spent=1.0)])
+    >>> _parse_tasks("- TODO 写代码 [耗时 1h]".encode())
+    ([], [Todo(text='写代码', est=2.0, spent=1.0)])
+    >>> _parse_tasks("- TODO 标注在中间 (预计 1h) 后面还有字".encode())
+    ([], [Todo(text='标注在中间  后面还有字', est=1.0, spent=0.0)])
+    >>> _parse_tasks(b"- TODO \\n- DONE \\t\\r\\n")
+    ([], [])
+    >>> _parse_tasks("- TODO\\u3000写代码\\u3000(预计\\u30001h)\\n- DONE\\u3000[耗时\\u30001h]\\u3000读论文".encode())
+    ([Done(text='读论文', est=2.0, dur=1.0)], [Todo(text='写代码', est=1.0, spent=0.0)])
+    >>> _parse_tasks("- TODO\\u3000\\u3000\\n".encode())
+    ([], [])
 
-        if st == "DONE":
-            dur = DUR_DONE.search(txt)
-            dur = float(dur.group(1)) if dur else est
-            txt = DUR_DONE.sub("", EST_RE.sub("", txt)).strip()
-            done.append({"text": txt, "est": est, "dur": dur})
+    超长空白 + 行中标注：占有量词保证线性时间（旧写法约需数秒）
+
+    >>> done, todo = _parse_tasks(("- TODO a" + " " * 32000 + "(预计 1h) b").encode())
+    >>> todo[0].est, todo[0].text.split()
+    (1.0, ['a', 'b'])
+    """
+    done, todo = [], []
+    for m in LINE_RE.finditer(buf):
+        st, raw = m["st"], m["raw"]
+        if raw is None:                              # 快速路径：标注都在行尾
+            body, est, dur = m["body"], m["est"], m["dur"]
+        else:                                        # 标注在行首/行中
+            est, dur = EST_RE.search(raw), DUR_RE.search(raw)
+            est, dur = est and est.group(1), dur and dur.group(1)
+            body = DUR_RE.sub(b"", EST_RE.sub(b"", raw))
+        txt = body.decode("utf-8").strip()
+        est = _hours(est, 2.0)                       # 默认 2 h
 
+        if st == b"DONE":
+            done.append(Done(txt, est, _hours(dur, est)))
         else:  # TODO
-            spent = DUR_TODO.search(txt)
-            spent = float(spent.group(1)) if spent else 0.0
-            txt = DUR_TODO.sub("", EST_RE.sub("", txt)).strip()
-            todo.append({"text": txt, "est": est, "spent": spent})
+            todo.append(Todo(txt, est, _hours(dur, 0.0)))
     return done, todo
 
+def parse_tasks_for_date(date):
+    file = JOURNALS / f"{date:%Y_%m_%d}.md"
+    try:
+        f = file.open("rb")
+    except FileNotFoundError:
+        return [], []
+    with f:
+        if not os.fstat(f.fileno()).st_size: return [], []   # 空文件无法 mmap
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            # 原始字节快速预筛：没有 - TODO / - DONE 就不跑正则
+            if mm.find(b"- TODO") == -1 and mm.find(b"- DONE") == -1:
+                return [], []
+            return _parse_tasks(mm)
+
 # ---------- 找到最近一份有效日志 ----------
 def find_latest_log(today, max_lookback=7):
     """
     向前最多 max_lookback 天，找到最近一份含 TODO/DONE 的日志。
     返回 (日期, done 列表, todo 列表)；若没找到则 (None, [], [])。
     """
+    # 一次列出 journals 目录，代替逐日 exists()
+    try:
+        with os.scandir(JOURNALS) as it:
+            names = {e.name for e in it if e.name.endswith(".md")}
+    except FileNotFoundError:
+        return None, [], []
+
     for delta in range(1, max_lookback + 1):
         date = today - dt.timedelta(days=delta)
+        name = f"{date:%Y_%m_%d}.md"
+        if name not in names:
+            continue              # 当天没有日志
         done, todo = parse_tasks_for_date(date)
         if done or todo:          # 找到有效记录就返回
             return date, done, todo
     return None, [], []           # 超过回溯范围也没找到
     
+# ---------- OpenAI 客户端（首次调用时才导入并创建）----------
+@functools.lru_cache(maxsize=None)
+def _client():
+    from openai import OpenAI
+    return OpenAI()
+
+# ---------- GPT 响应缓存 ----------
+def _cache_file(model, messages, temperature, **kw):
+    """以 (model, messages, temperature, 其余参数) 的 SHA-256 为键的缓存文件路径"""
+    payload = {"model": model, "messages": messages,
+               "temperature": temperature, **kw}
+    key  = hashlib.sha256(orjson.dumps(payload, option=orjson.OPT_SORT_KEYS)).hexdigest()
+    return CACHE_DIR / f"{key}.json"
+
+def _cache_get(file):
+    """CACHE_TTL 内的缓存返回内容，否则返回 None；读不到或内容不对都视作未命中"""
+    try:
+        if time.time() - file.stat().st_mtime >= CACHE_TTL: return None
+        content = orjson.loads(file.read_bytes())["content"]
+    except (OSError, orjson.JSONDecodeError, KeyError, TypeError):
+        return None
+    return content if isinstance(content, str) else None
+
+def _cache_put(file, content):
+    """先写临时文件再 os.replace，中途中断不会留下半截缓存"""
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=CACHE_DIR, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(orjson.dumps({"content": content}))
+        os.replace(tmp, file)
+    except BaseException:
+        try: os.unlink(tmp)
+        except OSError: pass
+        raise
+
+def cached_chat(model, messages, temperature, **kw):
+    """
+    带本地磁盘缓存的 chat completion。
+    CACHE_TTL 内的重复请求直接返回缓存内容，不再调用 OpenAI。
+    """
+    file    = _cache_file(model, messages, temperature, **kw)
+    content = _cache_get(file)
+    if content is not None: return content
+
+    resp = _client().chat.completions.create(
+        model=model, temperature=temperature, messages=messages, **kw)
+    content = resp.choices[0].message.content
+    try:
+        _cache_put(file, content)
+    except OSError:                        # 缓存只是优化，写失败也要返回已付费的结果
+        pass
+    return content
+
+def stream_chat(model, messages, temperature, **kw):
+    """
+    cached_chat 的流式版本：逐行 yield 模型输出（每收到一个换行就交出一行），
+    调用方可以边接收边写文件；完整内容在流结束后写入缓存。
+    """
+    file    = _cache_file(model, messages, temperature, **kw)
+    content = _cache_get(file)
+    if content is not None:
+        yield from content.splitlines()
+        return
+
+    resp = _client().chat.completions.create(
+        model=model, temperature=temperature, messages=messages,
+        stream=True, **kw)
+    parts, buf = [], ""
+    for chunk in resp:
+        if not chunk.choices: continue
+        token = chunk.choices[0].delta.content or ""
+        parts.append(token)
+        buf += token
+        *lines, buf = buf.split("\n")
+        yield from lines
+    if buf: yield buf
+    try:
+        _cache_put(file, "".join(parts))
+    except OSError:
+        pass
+
 # ---------- GPT 生成 ----------
+# System 提示只放不变的内容（角色、里程碑、资源），两个调用共用同一前缀，
+# 便于命中 OpenAI 服务端的前缀缓存；阶段等动态信息一律放进 User 提示。
+COACH_SYS = (
+    "You are an academic coach for a CFD master’s thesis titled "
+    "'Extreme-wave response of a floating offshore wind turbine for different mooring designs'.\n"
+    "Overall milestones:\n"
+    " • P0 (04-22→05-15): 50–200m Stokes5 grid convergence (<3%)\n"
+    " • P1 (05-16→06-10): NewWave focusing wave + draft\n"
+    " • P2 (06-11→07-01): Wind-wave coupling + reflection (<2%)\n"
+    " • P3 (07-02→07-20): 3D FOWT static blades ×2 moorings\n"
+    " • P4 (07-21→08-01): Thesis ≥60p + PPT 20p\n"
+    "Resources:\n"
+    " • 文献: ~/Documents/01Project/2411Masterarbeit/Resources + Zotero\n"
+    " • 仿真案例: ~/Programs/starccm case\n"
+)
+# 回顾：共用前缀 + 回顾任务说明（均为常量）
+REVIEW_SYS = COACH_SYS + (
+    "Task: provide a concise daily review.\n"
+    "Goal: summarize yesterday's work, highlight亮点, 指出改进点, 并给出鼓励与建议。\n"
+    "格式：\n"
+    "回顾：…\n"
+    "优点：…\n"
+    "改进：…\n"
+    "今日建议：…\n"
+)
+# 今日任务的数量与格式要求
+PLAN_RULES = (
+    "请基于效率：若实际>预计*1.1或昨天完成率<0.6，则任务减至 1-2 条；"
+    "若实际<预计*0.9或昨天完成率=1，则可给 2-3 条稍具挑战性任务。\n"
+    "列出 **今日需完成的 1-3 个任务**，格式：\n"
+    "动词 开头，中文任务描述 (预计 Xh)\n"
+    "每条 ≤ 30 字，独立行，无编号。"
+)
 
 def gpt_next_steps(prev_done, prev_todo,
                    task_rate, time_rate,
                    total_est, total_spent,
-                   phase_code, phase_desc):
-    sys = (
-        "You are an academic coach for a CFD master’s thesis titled "
-        "'Extreme-wave response of a floating offshore wind turbine for different mooring designs'.\n"
-        f"Phase: {phase_code} — {phase_desc}\n"
-        "Overall milestones:\n"
-        " • P0 (04-22→05-15): 50–200m Stokes5 grid convergence (<3%)\n"
-        " • P1 (05-16→06-10): NewWave focusing wave + draft\n"
-        " • P2 (06-11→07-01): Wind-wave coupling + reflection (<2%)\n"
-        " • P3 (07-02→07-20): 3D FOWT static blades ×2 moorings\n"
-        " • P4 (07-21→08-01): Thesis ≥60p + PPT 20p\n"
-        "Resources:\n"
-        " • 文献: ~/Documents/01Project/2411Masterarbeit/Resources + Zotero\n"
-        " • 仿真案例: ~/Programs/starccm case\n"
-    )
+                   phase_code, phase_desc, stream=False):
+    """
+    生成今日任务计划。stream=True 时返回逐行生成器，
+    可直接交给 append_to_logseq 边生成边写入。
+    """
+    sys_prompt = COACH_SYS
     # 2️⃣ User Prompt：动态上下文 + 示例 + 输出限制
     usr = (
+      f"Phase: {phase_code} — {phase_desc}\n"
       f"昨天完成率 {task_rate:.0%}，时间进度 {time_rate:.0%}；\n"
       f"预计 {total_est:.1f}h，实际 {total_spent:.1f}h。\n"
-      "已完成：" + ", ".join(d['text'] for d in prev_done) + "\n"
-      "未完成：" + ", ".join(t['text'] for t in prev_todo) + "\n\n"
-      "请基于效率：若实际>预计*1.1或昨天完成率<0.6，则任务减至 1-2 条；"
-      "若实际<预计*0.9或昨天完成率=1，则可给 2-3 条稍具挑战性任务。\n"
-      "列出 **今日需完成的 1-3 个任务**，格式：\n"
-      "动词 开头，中文任务描述 (预计 Xh)\n"
-      "每条 ≤ 30 字，独立行，无编号。"
+      "已完成：" + ", ".join(d.text for d in prev_done) + "\n"
+      "未完成：" + ", ".join(t.text for t in prev_todo) + "\n\n"
+      + PLAN_RULES
     )
 
-    resp=client.chat.completions.create(
+    kw=dict(
         model=MODEL,
         temperature=0.2,
-        messages=[{"role":"system","content":sys},
+        messages=[{"role":"system","content":sys_prompt},
                   {"role":"user","content":usr}],
-        stop=["\n\n"]
+        max_tokens=150,                    # ≤3 条 × ≤30 字，足够且防止失控输出
+        stop=["\n\n", "###"]
     )
-    return resp.choices[0].message.content.strip()
+    if stream: return stream_chat(**kw)
+    return cached_chat(**kw).strip()
 
 
 # ---------- Logseq 写入 ----------
 def append_to_logseq(today_text, task_rate, time_rate,
                      total_est,total_spent, phase_code):
+    """today_text 可以是完整字符串，也可以是逐行的迭代器（流式输出）"""
     file=JOURNALS/f"{dt.date.today():%Y_%m_%d}.md"
     file.parent.mkdir(parents=True, exist_ok=True)
     ts=dt.datetime.now().strftime("%H:%M")
@@ -148,8 +338,18 @@ def append_to_logseq(today_text, task_rate, time_rate,
             f"- 时间进度：{time_rate:.0%}\n"
             f"- 昨日完成率：{task_rate:.0%}\n"
             f"- 昨日预计/实际：{total_est:.1f}h / {total_spent:.1f}h\n")
-    bullets="\n".join(f"- TODO {l.strip()}" for l in today_text.splitlines())
-    with file.open("a",encoding="utf-8") as f: f.write(header+bullets+"\n")
+    streamed=not isinstance(today_text,str)
+    lines=today_text if streamed else today_text.splitlines()
+    with file.open("a",encoding="utf-8",buffering=65536) as f:
+        f.write(header)
+        for l in lines:
+            l=l.strip()
+            if l.startswith("-"):          # GPT 自带的列表符号，避免写成 "- TODO - …"
+                l=l.lstrip("-").strip()
+                if l.startswith("TODO "): l=l[5:].lstrip()
+            if not l: continue
+            f.write("- TODO "); f.write(l); f.write("\n")
+            if streamed: f.flush()         # 流式输入时每行立即落盘
 
 
 # ---------- GPT 回顾反馈（新功能）----------
@@ -162,35 +362,88 @@ def gpt_daily_review(prev_done, prev_todo,
     生成自然语言的“回顾与反馈”总结。
     """
     # 1️⃣ System 提示：给模型场景和角色
-    sys = (
-        "You are an academic coach providing a concise daily review for a CFD master’s thesis.\n"
-        f"Phase: {phase_code} — {phase_desc}\n"
-        "Goal: summarize yesterday's work, highlight亮点, 指出改进点, 并给出鼓励与建议。\n"
-        "格式：\n"
-        "回顾：…\n"
-        "优点：…\n"
-        "改进：…\n"
-        "今日建议：…\n"
-    )
+    sys_prompt = REVIEW_SYS
     # 2️⃣ User 提示：动态填充昨日数据
     usr = (
+        f"Phase: {phase_code} — {phase_desc}\n"
         f"昨日完成率 {task_rate:.0%}，时间进度 {time_rate:.0%}，"
         f"预计 {total_est:.1f}h，实际 {total_spent:.1f}h。\n"
-        "完成任务：" + (", ".join(d['text'] for d in prev_done) or "无") + "\n"
-        "未完成任务：" + (", ".join(t['text'] for t in prev_todo) or "无") + "\n\n"
+        "完成任务：" + (", ".join(d.text for d in prev_done) or "无") + "\n"
+        "未完成任务：" + (", ".join(t.text for t in prev_todo) or "无") + "\n\n"
         "请根据上述内容，生成“回顾与反馈”。"
     )
 
-    resp = client.chat.completions.create(
+    text = cached_chat(
         model=MODEL,
-        temperature=0.3,
+        temperature=0,                     # 固定模板，无需随机性；输出稳定、利于缓存
         messages=[
-            {"role": "system", "content": sys},
+            {"role": "system", "content": sys_prompt},
             {"role": "user",   "content": usr}
         ],
         max_tokens=300,
     )
-    return resp.choices[0].message.content.strip()
+    return text.strip()
+
+
+# ---------- GPT 回顾 + 计划（单次请求）----------
+def gpt_combined(prev_done, prev_todo,
+                 task_rate, time_rate,
+                 total_est, total_spent,
+                 phase_code, phase_desc):
+    """
+    一次请求同时生成“回顾与反馈”和“今日任务计划”，
+    以 JSON 对象 {"review": ..., "plan": ...} 返回，
+    省去第二次请求的网络往返和重复的上下文 token。
+    返回 (review, plan)。
+    """
+    usr = (
+        f"Phase: {phase_code} — {phase_desc}\n"
+        f"昨日完成率 {task_rate:.0%}，时间进度 {time_rate:.0%}，"
+        f"预计 {total_est:.1f}h，实际 {total_spent:.1f}h。\n"
+        "完成任务：" + (", ".join(d.text for d in prev_done) or "无") + "\n"
+        "未完成任务：" + (", ".join(t.text for t in prev_todo) or "无") + "\n\n"
+        "请输出 JSON 对象 {\"review\": \"...\", \"plan\": \"...\"}：\n"
+        "review：按上述格式生成“回顾与反馈”；\n"
+        "plan：今日任务，多条之间用换行分隔。\n"
+        + PLAN_RULES
+    )
+
+    text = cached_chat(
+        model=MODEL,
+        temperature=0,                     # 含回顾部分，与 gpt_daily_review 一致
+        messages=[
+            {"role": "system", "content": REVIEW_SYS},
+            {"role": "user",   "content": usr}
+        ],
+        response_format={"type": "json_object"},
+        max_tokens=500,
+    )
+    out = orjson.loads(text)                    # 非法 JSON -> orjson.JSONDecodeError
+    if not isinstance(out, dict):
+        raise ValueError(f"gpt_combined: 返回的不是 JSON 对象：{text[:200]}")
+    review, plan = out.get("review"), out.get("plan")
+    if isinstance(plan, list):                  # 模型有时把多条任务输出为数组
+        plan = "\n".join(str(x) for x in plan)
+    if not isinstance(review, str) or not isinstance(plan, str):
+        raise ValueError(f"gpt_combined: JSON 缺少字符串字段 review/plan：{text[:200]}")
+    return review.strip(), plan.strip()
+
+
+def gpt_review_and_plan(*args):
+    """
+    优先用 gpt_combined 单次请求；若返回的 JSON 无法解析或缺字段，
+    退回 gpt_daily_review + gpt_next_steps —— 两者互不依赖，并行发出。
+    参数与 gpt_combined 相同，返回 (review, plan)。
+    """
+    try:
+        return gpt_combined(*args)
+    except ValueError:                          # 含 orjson.JSONDecodeError
+        async def both():
+            return await asyncio.gather(
+                asyncio.to_thread(gpt_daily_review, *args),
+                asyncio.to_thread(gpt_next_steps, *args))
+        review, plan = asyncio.run(both())
+        return review, plan
 
 
 def append_review_to_logseq(review_text):
@@ -213,36 +466,43 @@ if __name__=="__main__":
     if yest_date is None:
         yest_date = today - dt.timedelta(days=1)
 
-    # 1. 解析昨日任务数据
-    done_y, todo_y = parse_tasks_for_date(yest_date)
-    total_est   = sum(x['est']   for x in done_y + todo_y)
-    total_spent = sum(x['dur']   for x in done_y) + sum(x['spent'] for x in todo_y)
+    # 1. 统计昨日任务数据（done_y / todo_y 已由 find_latest_log 解析）
+    total_est   = sum(x.est   for x in done_y + todo_y)
+    total_spent = sum(x.dur   for x in done_y) + sum(x.spent for x in todo_y)
     efficiency  = total_spent / total_est if total_est else 1.0
     task_rate   = len(done_y) / (len(done_y) + len(todo_y)) if (done_y or todo_y) else 0
-    phase_code, phase_desc = get_current_phase()
-    time_rate   = get_time_progress(phase_code)
-
-    # 2. 生成“回顾与反馈”
-    review = gpt_daily_review(
-        done_y, todo_y,
-        task_rate, time_rate,
-        total_est, total_spent,
-        phase_code, phase_desc
-    )
-    append_review_to_logseq(review)
-
-    # 3. 生成“今日任务计划”
-    plan_today = gpt_next_steps(
-        done_y, todo_y,
-        task_rate, time_rate,
-        total_est, total_spent,
-        phase_code, phase_desc
-    )
-    append_to_logseq(plan_today, task_rate, time_rate, total_est, total_spent, phase_code)
+    phase_code, phase_desc = get_current_phase(today)
+    time_rate   = get_time_progress(phase_code, today)
+
+    args = (done_y, todo_y,
+            task_rate, time_rate,
+            total_est, total_spent,
+            phase_code, phase_desc)
+
+    if "--stream" in sys.argv[1:]:
+        # 2'. 流式：先生成回顾，再让今日计划边生成边写入日志、边输出到控制台
+        review = gpt_daily_review(*args)
+        append_review_to_logseq(review)
+        print("=== 昨日回顾 ===")
+        print(review)
+        print("\n=== 今日计划 ===")
+
+        def echo(lines):
+            for l in lines:
+                print(l, flush=True)
+                yield l
+        append_to_logseq(echo(gpt_next_steps(*args, stream=True)),
+                         task_rate, time_rate, total_est, total_spent, phase_code)
+    else:
+        # 2. 一次请求生成“回顾与反馈”和“今日任务计划”
+        review, plan_today = gpt_review_and_plan(*args)
+        append_review_to_logseq(review)
 
-    # 4. 输出到控制台
-    print("=== 昨日回顾 ===")
-    print(review)
-    print("\n=== 今日计划 ===")
-    print(plan_today)
+        # 3. 写入今日任务计划
+        append_to_logseq(plan_today, task_rate, time_rate, total_est, total_spent, phase_code)
 
+        # 4. 输出到控制台
+        print("=== 昨日回顾 ===")
+        print(review)
+        print("\n=== 今日计划 ===")
+        print(plan_today)